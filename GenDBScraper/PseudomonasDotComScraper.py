@@ -1,21 +1,25 @@
 """ :module PseudomonasDotComScraper: Hosting the PseudomonasDotComScraper, an API for the https://www.pseudomonas.com database web interface. """
 
 from GenDBScraper.Utilities.json_utilities import JSONEncoder
-from GenDBScraper.Utilities.web_utilities import guarded_get
+from GenDBScraper.Utilities.web_utilities import guarded_get, guarded_head, new_session
 
 # 3rd party imports
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
 from collections import OrderedDict
 from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
 from doi2bib import crossref
+from functools import lru_cache
 from io import StringIO
 from pubmed_lookup import Publication, PubMedLookup
+from urllib.parse import urlencode
 import json
 import logging
 import numpy
 import pandas
 import re
 import tempfile
+import threading
 import xmltodict
 
 # Configure logging.
@@ -30,18 +34,88 @@ pdc_query = namedtuple('pdc_query',
                        defaults=(None, None, None),
                        )
 
+# Precompile the regular expressions needed for every query.
+_HEADING_PATTERNS = dict((heading, re.compile(heading)) for heading in ["Gene Feature Overview",
+                                                                        "Cross-References",
+                                                                        "Product",
+                                                                        "Pathogen Association Analysis",
+                                                                        "Sequence Data",
+                                                                        "Gene Ontology",
+                                                                        "Functional Classifications Manually Assigned by PseudoCAP",
+                                                                        "Functional Predictions from Interpro",
+                                                                        "Operons",
+                                                                        "Transposon Insertions",
+                                                                        "Annotation Updates",
+                                                                        ])
+_REFERENCES_PATTERN = re.compile('^References')
+_TAB_PATTERN = re.compile('[\t]')
+_WHITESPACE_PATTERN = re.compile(r'[\t\s]')
+_CELL_WHITESPACE_PATTERN = re.compile(r"[\r\n]+|\s{2,}")
+
+# Cell texts that pandas.read_html reads as NaN by default.
+_NA_VALUES = frozenset(['', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN',
+                        '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null'])
+_DNA_PATTERN = re.compile(r"^DNA.+$")
+_BLAST_PATTERN = re.compile(r"BLAST.+$")
+_SPACE_PATTERN = re.compile(r"[A-Z]\s[A-Z]")
+_SEPARATOR_PATTERN = re.compile(r"([a-z,1-9])\s([A-Z]+)\s*$")
+_OPERON_NAME_PATTERN = re.compile("Operon name")
+_EVIDENCE_PATTERN = re.compile('Evidence')
+_EVIDENCE_STRIP_PATTERN = re.compile(r"[\t\n\s\.]")
+_PUBMED_ID_PATTERN = re.compile('PubMed ID')
+_LOCALIZATION_PATTERNS = dict((key, re.compile(key + ".*$")) for key in ["Individual Mappings", "Additional evidence"])
+_DOI_PATTERN = re.compile("DOI")
+_DOI_NUMBER_PATTERN = re.compile(r'10\.[0-9]*\/')
+_DOI_STRIP_PATTERN = re.compile(r"[\t,\n,\s]")
+
+# Restrict parsing of the feature list page to its links. Tags not listed here are dropped
+# from the soup, so any code that navigates to other tags on that page must extend the strainer first.
+# The tab pages are parsed in full: their tables are found relative to the headings (see
+# _pandasDFs_from_headings()), which needs the elements in between.
+_LINKS_STRAINER = SoupStrainer('a')
+
+# Number of panels each query pulls concurrently, one request per panel (see _run_one_query()).
+_PANEL_COUNT = 8
+
+# Maximum number of pages a scraper keeps in memory, the least recently used are dropped first.
+_CACHE_MAXSIZE = 256
+
 
 class PseudomonasDotComScraper():
-    """  An API for the pseudomonas.com genome database using web scraping technology. """
+    """  An API for the pseudomonas.com genome database using web scraping technology.
+
+    Use the scraper as a context manager to connect on entry and release its network connections on exit.
+
+    :example: with PseudomonasDotComScraper(query={'strain' : 'sbw25', 'feature' : 'pflu0916'}) as scraper:
+                  results = scraper.run_query()
+
+    """
+
+    # Declare all attributes up front so that instances have no __dict__. Private names are still mangled.
+    # '__weakref__' keeps instances weakly referenceable.
+    __slots__ = ('__query',
+                 '__pdc_url',
+                 '__connected',
+                 '__results',
+                 '__session',
+                 '__pool_maxsize',
+                 '__use_cache',
+                 '__cache',
+                 '__cache_lock',
+                 '__weakref__',
+                 )
 
     # Class constructor
-    def __init__(self, query=None,):
+    def __init__(self, query=None, use_cache=True):
         """
         PseudomonasDotComScraper constructor.
 
         :param query: The query to submit to the database.
         :type query: (pdc_query || dict)
 
+        :param use_cache: Whether to serve repeatedly requested pages from memory instead of fetching them again, up to 256 pages (default: True).
+        :type  use_cache: bool
+
         :example: scraper = PseudomonasDotComScraper(query={'strain' : 'sbw25', 'feature' : 'pflu0916'})
         :example: scraper = PseudomonasDotComScraper(query=pdc_query(strain='sbw25', feature='pflu0916'))
 
@@ -50,10 +124,20 @@ class PseudomonasDotComScraper():
         # Initialize all variables.
         self.__query = None
         self.__pdc_url = 'https://www.pseudomonas.com'
-        self.__browser = None
         self.__connected = False
         self.__results = None
 
+        # Every scraper keeps its own pool of connections to the server, large enough for the
+        # default number of concurrent queries in run_query(). run_query() grows it if needed.
+        self.__pool_maxsize = 4 * _PANEL_COUNT
+        self.__session = new_session(pool_maxsize=self.__pool_maxsize)
+        self.__use_cache = use_cache
+
+        # Page contents by URL in order of last use, filled by _get_content() and emptied by close().
+        # The lock guards the cache against the threads pulling panels concurrently.
+        self.__cache = OrderedDict()
+        self.__cache_lock = threading.Lock()
+
         # Set attributes via setter.
         self.query = query
 
@@ -91,50 +175,33 @@ class PseudomonasDotComScraper():
         exc = TypeError("The parameter 'query' must be a dict or pdc_query or a list, tuple, or set of queries. Examples: query={'strain' : 'sbw25', 'feature'='pflu0916'}; query=pdc_query(strain='sbw25', feature='pflu0916') or query=[pdc_query(strain='sbw25', feature='pflu0916'), pdc_query(strain='sbw25', feature='pflu0917')].")
 
         if not isinstance(val, list):
-            if not (isinstance(val, dict) or isinstance(val, pdc_query)):
-                raise exc
-            else:
-                val = [val]
+            val = [val]
 
-        for i, v in enumerate(val):
-            if isinstance(v, dict):
-                pass
-            elif isinstance(v, pdc_query):
-                pass
-            else:
-                raise exc
+        if not all(isinstance(v, (dict, pdc_query)) for v in val):
+            raise exc
+
+        # Only these are acceptable query keywords.
+        accepted_keys = frozenset(pdc_query._fields)
 
         # Iterate over all queries.
         for i, v in enumerate(val):
             # Check keys if dict.
             if isinstance(v, dict):
-                # Only these are acceptable query keywords.
-                accepted_keys = ('strain', 'feature', 'organism')
-                present_keys = v.keys()
-                for k in present_keys:
-                    if k not in accepted_keys:
-                        raise KeyError("Only 'strain', 'feature', and 'organism' are acceptable keys.)")
-
-                # Complete keywords.
-                if 'strain' not in v.keys():
-                    v['strain'] = None
-                if 'feature' not in v.keys():
-                    v['feature'] = None
-                if 'organism' not in v.keys():
-                    v['organism'] = None
-
-                # Convert to pdc_query
+                if not v.keys() <= accepted_keys:
+                    raise KeyError("Only 'strain', 'feature', and 'organism' are acceptable keys.)")
+
+                # Convert to pdc_query, missing keywords default to None.
                 logging.info('Query dictionary passed to pseudomonas.com scraper will now be converted to a pdc_query object. See reference manual for more details.')
-                v = _dict_to_pdc_query(**v)
+                v = pdc_query(**v)
 
             # Check keywords are internally consistent.
             if v.organism is not None and v.strain is not None:
                 raise KeyError("Invalid combination of query keywords: 'organism' must not be combined with 'strain'.")
 
             # Check all values are strings or None.
-            for vv in v[:]:
-                if not (isinstance(vv, str) or vv is None):
-                    raise TypeError("All values in the query must be of type str.")
+            if not all(vv is None or isinstance(vv, str) for vv in v):
+                raise TypeError("All values in the query must be of type str.")
+
             # Reset checked item.
             val[i] = v
 
@@ -154,19 +221,48 @@ class PseudomonasDotComScraper():
     def connect(self):
         """ Connect to the database. """
         try:
-            self.__browser = BeautifulSoup(guarded_get(self.__pdc_url), 'html.parser')
+            # Only check the server responds, the front page itself is not needed.
+            guarded_head(self.__pdc_url, self.__session)
         except:
             self.__connected = False
-            raise ConnectionError("Connecting to {0:s} failed. Make sure the URL is set correctly and is reachable.")
+            raise ConnectionError("Connecting to {0:s} failed. Make sure the URL is set correctly and is reachable.".format(self.__pdc_url))
 
         self.__connected = True
 
-    def run_query(self, query=None):
+    def close(self):
+        """ Close all connections to the database. """
+
+        self.__session.close()
+        with self.__cache_lock:
+            self.__cache.clear()
+        self.__connected = False
+
+    def __enter__(self):
+        """ Connect to the database when entering a with block. """
+
+        # __exit__ does not run if entering fails, release the connections here.
+        try:
+            self.connect()
+        except:
+            self.close()
+            raise
+
+        return self
+
+    def __exit__(self, *exc):
+        """ Close all connections when leaving a with block. Exceptions are propagated. """
+
+        self.close()
+
+    def run_query(self, query=None, max_workers=4):
         """ Run a query on pseudomonas.com
 
         :param query: The query object to run.
         :type  query: [list of] (pdc_query | dict)
 
+        :param max_workers: How many queries to run concurrently. Each query in turn pulls its 8 panels concurrently, so up to 8 * max_workers requests are sent to pseudomonas.com at once (32 by default). The connection pool is enlarged to match if needed.
+        :type  max_workers: int
+
         :return: The query results as a dictionary with 'strain_feature' keys.
         :rtype: dict
 
@@ -180,14 +276,58 @@ class PseudomonasDotComScraper():
         if query is not None:
             self.query = query
 
+        # Every running query keeps one connection per panel busy, make sure the pool holds them all.
+        pool_maxsize = max_workers * _PANEL_COUNT
+        if pool_maxsize > self.__pool_maxsize:
+            self.__session.close()
+            self.__session = new_session(pool_maxsize=pool_maxsize)
+            self.__pool_maxsize = pool_maxsize
+
+        # Queries are independent of each other, run them concurrently.
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [(query, executor.submit(self._run_one_query, query)) for query in self.query]
+
         results = dict()
 
-        for query in self.query:
+        for query, future in futures:
             key = "{0:s}__{1:s}".format(query.strain, query.feature)
-            results[key] = self._run_one_query(query)
+            results[key] = future.result()
 
         self.__results = results
 
+        return results
+
+    def _get_content(self, url, expected_content_type='text'):
+        """ Get the content of the passed URL through this scraper's session.
+
+        :param url: The URL to get.
+        :type  url: str
+
+        :param expected_content_type: String to look for in the response's media type (see web_utilities.is_good_response).
+        :type  expected_content_type: str
+
+        """
+
+        if not self.__use_cache:
+            return guarded_get(url, self.__session, expected_content_type)
+
+        with self.__cache_lock:
+            content = self.__cache.get(url)
+            if content is not None:
+                self.__cache.move_to_end(url)
+                return content
+
+        # Fetch outside the lock. Concurrent misses on the same URL may both fetch it, the last one wins.
+        content = guarded_get(url, self.__session, expected_content_type)
+
+        with self.__cache_lock:
+            self.__cache[url] = content
+            self.__cache.move_to_end(url)
+            if len(self.__cache) > _CACHE_MAXSIZE:
+                self.__cache.popitem(last=False)
+
+        return content
+
     def _get_feature_url(self, query):
         """ Get the base URL for the queried feature (gene).
 
@@ -202,19 +342,23 @@ class PseudomonasDotComScraper():
 
         # Assemble the html query.
         if query.strain is not None:    # Searching for specific strain.
-            _url = self.__pdc_url + "/primarySequenceFeature/list?c1=name&v1={0:s}&e1=1&term1={1:s}&assembly=complete".format(_feature, query.strain)
+            term = ('term1', query.strain)
         elif query.organism is not None:    # Searching for organism.
-            _url = self.__pdc_url + "/primarySequenceFeature/list?c1=name&v1={0:s}&e1=1&term2={1:s}&assembly=complete".format(_feature, self.query.organism)
+            term = ('term2', query.organism)
+
+        # Let urlencode escape user supplied values.
+        parameters = urlencode([('c1', 'name'), ('v1', _feature), ('e1', '1'), term, ('assembly', 'complete')])
+        _url = self.__pdc_url + "/primarySequenceFeature/list?" + parameters
 
         # Debug info.
-        logging.debug("Will now open {0:s} .".format(_url))
+        logging.debug("Will now open %s .", _url)
 
         # Get the soup for the assembled url.
-        browser = BeautifulSoup(guarded_get(_url), 'html.parser')
+        browser = BeautifulSoup(self._get_content(_url), 'lxml', parse_only=_LINKS_STRAINER)
 
         # If we're looking for a unique feature.
-        if _feature is not '':
-            feature_link = browser.find_all('a', string=re.compile(_feature.upper()))[0].get('href')
+        if _feature:
+            feature_link = browser.find('a', string=_feature_pattern(_feature)).get('href')
 
         return self.__pdc_url + feature_link
 
@@ -226,19 +370,25 @@ class PseudomonasDotComScraper():
         :type  query: pdc_query
         """
 
-        # Setup dict to store self.query results.
-        panels = dict()
         feature_url = self._get_feature_url(query)
 
-        # Go through all panels and pull data.
-        panels["Overview"] = self._get_overview(feature_url)
-        panels["Sequences"] = self._get_sequences(feature_url)
-        panels["Function/Pathways/GO"] = self._get_functions_pathways_go(feature_url)
-        panels["Motifs"] = self._get_motifs(feature_url)
-        panels["Operons"] = self._get_operons(feature_url)
-        panels["Transposon Insertions"] = self._get_transposon_insertions(feature_url)
-        panels["Updates"] = self._get_updates(feature_url)
-        panels["Orthologs"] = self._get_orthologs(feature_url)
+        # Map panel names to the methods that pull them.
+        getters = OrderedDict([("Overview", self._get_overview),
+                               ("Sequences", self._get_sequences),
+                               ("Function/Pathways/GO", self._get_functions_pathways_go),
+                               ("Motifs", self._get_motifs),
+                               ("Operons", self._get_operons),
+                               ("Transposon Insertions", self._get_transposon_insertions),
+                               ("Updates", self._get_updates),
+                               ("Orthologs", self._get_orthologs),
+                               ])
+
+        # The panels only depend on the feature URL, so pull them concurrently, at most _PANEL_COUNT at a time.
+        with ThreadPoolExecutor(max_workers=_PANEL_COUNT) as executor:
+            futures = OrderedDict((panel, executor.submit(getter, feature_url)) for panel, getter in getters.items())
+
+        # Setup dict to store self.query results. Exceptions raised in a getter are re-raised here.
+        panels = dict((panel, future.result()) for panel, future in futures.items())
 
         # All done, return.
         return panels
@@ -257,22 +407,28 @@ class PseudomonasDotComScraper():
         overview_url = url + "&view=overview"
 
         # Get the soup.
-        browser = BeautifulSoup(guarded_get(overview_url), 'lxml')
+        browser = BeautifulSoup(self._get_content(overview_url), 'lxml')
 
         # Empty return dict.
         overview_panel = dict()
 
-        overview_panel["Gene Feature Overview"] = _pandasDF_from_heading(browser, "Gene Feature Overview", None)
+        # Get all plain tables in one pass over the headings.
+        tables = _pandasDFs_from_headings(browser, {"Gene Feature Overview": None,
+                                                    "Product": None,
+                                                    "Pathogen Association Analysis": 0,
+                                                    })
+
+        overview_panel["Gene Feature Overview"] = tables["Gene Feature Overview"]
 
         # Get cross-references with hyperlinks.
         overview_panel["Cross-References"] = self._get_cross_references(url)
 
         # Get remaining tables.
-        overview_panel["Product"] = _pandasDF_from_heading(browser, "Product", None)
+        overview_panel["Product"] = tables["Product"]
 
         # Get subcellular localizations.
         overview_panel["Subcellular Localizations"] = self._get_subcellular_localizations(browser)
-        overview_panel["Pathogen Association Analysis"] = _pandasDF_from_heading(browser, "Pathogen Association Analysis", 0)
+        overview_panel["Pathogen Association Analysis"] = tables["Pathogen Association Analysis"]
         #overview_panel["Orthologs/Comparative Genomics"] = _pandasDF_from_heading(browser, "Orthologs/Comparative Genomics", 0)
         #overview_panel["Interactions"] = _pandasDF_from_heading(browser, "Interactions", 0)
         overview_panel["References"] = _pandas_references(browser)
@@ -283,11 +439,10 @@ class PseudomonasDotComScraper():
         """ Extract the cross-references table with hyperlinks from the feature overview tab. """
         # Get ovierview tab.
         cross_references_url = url + "&view=overview"
-        soup = BeautifulSoup(guarded_get(cross_references_url), 'lxml')
+        soup = BeautifulSoup(self._get_content(cross_references_url), 'lxml')
 
         # Navigate to heading.
-        table_heading = "Cross-References"
-        heading = soup.find('h3', string=re.compile(table_heading))
+        heading = soup.find('h3', string=_HEADING_PATTERNS["Cross-References"])
 
         # Get content.
         cross_refs = heading.find_next_sibling('table')
@@ -297,9 +452,6 @@ class PseudomonasDotComScraper():
         ref_ids = []
         ref_urls = []
 
-        # Need to substitute \t\s sequences.
-        pattern = re.compile('[\t\s]')
-
         # Loop over rows in the table.
         rows = cross_refs.find_all('tr')
         for i, row in enumerate(rows):
@@ -307,15 +459,15 @@ class PseudomonasDotComScraper():
 
             # Parse the data. First column is the reference type, second is the id, sometimes it's a hyperlink.
             ref_type = cols[0].text
-            ref_type = pattern.sub('', ref_type)
+            ref_type = _WHITESPACE_PATTERN.sub('', ref_type)
 
             # Get 2nd column.
             hyperlink = cols[1].find('a')
             if hyperlink is not None:
-                ref_id_text = pattern.sub('', hyperlink.text)
+                ref_id_text = _WHITESPACE_PATTERN.sub('', hyperlink.text)
                 ref_id_url = hyperlink.get('href')
             else:
-                ref_id_text = pattern.sub('', cols[1].text)
+                ref_id_text = _WHITESPACE_PATTERN.sub('', cols[1].text)
                 ref_id_url = None
 
             # Append to lists.
@@ -346,7 +498,7 @@ class PseudomonasDotComScraper():
         """
 
         sequence_url = url + "&view=sequence"
-        browser = BeautifulSoup(guarded_get(sequence_url), 'lxml')
+        browser = BeautifulSoup(self._get_content(sequence_url), 'lxml')
 
         df = _pandasDF_from_heading(browser, "Sequence Data", None).drop(index=0).drop(columns=2)
 
@@ -354,13 +506,7 @@ class PseudomonasDotComScraper():
         # Replace whitespace by '_' in row title column.
 
         # Genes
-        dna_pattern = re.compile(r"^DNA.+$")
-        dna_tags = [idx for idx in df[0] if dna_pattern.match(idx)]
-
-        # Setup empty dataframe to store cleaned up sequences.
-        blast_pattern = re.compile(r"BLAST.+$")
-        space_pattern = re.compile(r"[A-Z]\s[A-Z]")
-        separator_pattern = re.compile(r"([a-z,1-9])\s([A-Z]+)\s*$")
+        dna_tags = [idx for idx in df[0] if _DNA_PATTERN.match(idx)]
 
         # Go though nucleotide sequences.
         for tag in dna_tags:
@@ -369,13 +515,13 @@ class PseudomonasDotComScraper():
             seq = df.loc[df[0]==tag, 1].values[0]
 
             # Remove blast links
-            seq = blast_pattern.sub("",seq)
+            seq = _BLAST_PATTERN.sub("",seq)
 
             # Remove spaces
-            seq = space_pattern.sub("", seq)
+            seq = _SPACE_PATTERN.sub("", seq)
 
             # Separate header and sequence.
-            seq = separator_pattern.sub(r'\1\n\2', seq)
+            seq = _SEPARATOR_PATTERN.sub(r'\1\n\2', seq)
 
             # Store in dataframe
             df.loc[df[0]==tag, 1] = seq
@@ -384,9 +530,9 @@ class PseudomonasDotComScraper():
         aaseq = df.loc[df[0]=="Amino Acid Sequence", 1].values[0]
 
         # Strip blast porn
-        aaseq = blast_pattern.sub("", aaseq)
-        aaseq = space_pattern.sub("", aaseq)
-        aaseq = separator_pattern.sub(r'\1\n\2', aaseq)
+        aaseq = _BLAST_PATTERN.sub("", aaseq)
+        aaseq = _SPACE_PATTERN.sub("", aaseq)
+        aaseq = _SEPARATOR_PATTERN.sub(r'\1\n\2', aaseq)
 
 
         df.loc[df[0]=="Amino Acid Sequence", 1] = aaseq
@@ -406,15 +552,15 @@ class PseudomonasDotComScraper():
 
         """
 
-        panels = dict()
         # Get functions, pathways, GO
         function_url = url + "&view=functions"
 
-        browser = BeautifulSoup(guarded_get(function_url), 'lxml')
+        browser = BeautifulSoup(self._get_content(function_url), 'lxml')
 
-        panels["Gene Ontology"] = _pandasDF_from_heading(browser, "Gene Ontology", None)
-        panels["Functional Classifications Manually Assigned by PseudoCAP"] = _pandasDF_from_heading(browser, "Functional Classifications Manually Assigned by PseudoCAP", None)
-        panels["Functional Predictions from Interpro"] = _pandasDF_from_heading(browser, "Functional Predictions from Interpro", None)
+        panels = _pandasDFs_from_headings(browser, {"Gene Ontology": None,
+                                                    "Functional Classifications Manually Assigned by PseudoCAP": None,
+                                                    "Functional Predictions from Interpro": None,
+                                                    })
 
         # Convert E-values to floats.
         panels["Functional Predictions from Interpro"]["E-value"] = pandas.to_numeric(panels["Functional Predictions from Interpro"]["E-value"], errors='coerce', downcast='float')
@@ -435,7 +581,7 @@ class PseudomonasDotComScraper():
         logging.info("Querying Motifs is not implemented yet.")
         # Get motifs tab.
         # motifs_url = url + "&view=motifs"
-        # BeautifulSoup(guarded_get(motifs_url), 'lxml')
+        # BeautifulSoup(self._get_content(motifs_url), 'lxml')
 
         return pandas.DataFrame()
 
@@ -452,11 +598,10 @@ class PseudomonasDotComScraper():
 
         # Get operons tab.
         operons_url = url + "&view=operons"
-        soup = BeautifulSoup(guarded_get(operons_url), 'lxml')
-        table_heading = "Operons"
+        soup = BeautifulSoup(self._get_content(operons_url), 'lxml')
 
         # Navigate to heading.
-        heading = soup.find('h3', string=re.compile(table_heading))
+        heading = soup.find('h3', string=_HEADING_PATTERNS["Operons"])
 
         # Get content.
         operons = heading.find_next_siblings('table')
@@ -475,34 +620,32 @@ class PseudomonasDotComScraper():
                 logging.warning("No operon data found.")
                 break
 
-            name = operon.findChild(string=re.compile("Operon name"))
-            tabs = re.compile("\t*")
-            name = tabs.sub("", name)
+            name = operon.findChild(string=_OPERON_NAME_PATTERN)
+            name = _TAB_PATTERN.sub("", name)
             name = name.split("\n")[2]
 
             operon_dict['Genes'] = tmp[1]
 
             # Collect metadata (evidence and cross-references)
             meta = {}
-            evidence = str(operon.find(string=re.compile('Evidence')).find_next('div').text)
-            evidence = re.compile("[\t\n\s\.]").sub("", evidence)
-            evidence = re.sub("\.", "", evidence)
+            evidence = str(operon.find(string=_EVIDENCE_PATTERN).find_next('div').text)
+            evidence = _EVIDENCE_STRIP_PATTERN.sub("", evidence)
             meta["Evidence"] = evidence
 
-            cross_references = str(operon.find(string=re.compile("Cross-References")).find_next('div').find_next('div').text)
-            cross_references = re.compile("[\t\n\s]").sub("", cross_references)
+            cross_references = str(operon.find(string=_HEADING_PATTERNS["Cross-References"]).find_next('div').find_next('div').text)
+            cross_references = _WHITESPACE_PATTERN.sub("", cross_references)
             meta["Cross-References"] =  cross_references
 
             operon_dict["Meta"] = pandas.DataFrame([meta])
 
-            references = operon.find_all(string=re.compile('PubMed ID'))
+            references = operon.find_all(string=_PUBMED_ID_PATTERN)
             refs = []
 
             for ref in references:
                 pubmed = ref.find_next_sibling('a')
                 pubmed_url = pubmed.get('href')
                 pubmed_id = str(pubmed.text)
-                pubmed_id = re.compile('[\t\n\s]').sub('', pubmed_id)
+                pubmed_id = _WHITESPACE_PATTERN.sub('', pubmed_id)
 
                 refs.append(dict(pubmed_id=pubmed_id))
             operon_dict['References'] = pandas.DataFrame(refs)
@@ -527,12 +670,10 @@ class PseudomonasDotComScraper():
 
         # Get transposons tab.
         transposons_url = url + "&view=transposons"
-        browser = BeautifulSoup(guarded_get(transposons_url), 'html.parser')
-
-        table_heading = "Transposon Insertions"
+        browser = BeautifulSoup(self._get_content(transposons_url), 'lxml')
 
         # Get all headings with "Transposons" in them.
-        headings = browser.find_all('h3', string=re.compile(table_heading))
+        headings = browser.find_all('h3', string=_HEADING_PATTERNS["Transposon Insertions"])
 
         # Setup return dict.
         transposon_dict = dict()
@@ -541,49 +682,27 @@ class PseudomonasDotComScraper():
         for h in headings:
 
             # Have to reformat the key (get rid of \t\n sequences and whitespaces at beginning and end of lines.
-            key = h.get_text()
-            key = re.compile(r'\n+').sub(" ", key)
-            key = re.compile(r'\t+').sub(" ", key)
-            key = re.compile(r'\s+').sub(" ", key)
-            key = re.compile(r'^\s').sub("", key)
-            key = re.compile(r'\s$').sub("", key)
+            key = " ".join(h.get_text().split())
 
             # Every table goes in a dict by itself.
             transposon_dict[key] = None
 
-            # Get table from the parent if exists. If not, setup empty frame.
+            # Get table from the parent if exists. If not, leave the entry empty.
             parent = h.parent
-            try:
-                table = pandas.read_html(str(parent))[0]
-            except ValueError:
-                table = pandas.DataFrame()
+            table = parent if parent.name == 'table' else parent.find('table')
+            if table is None:
                 logging.warning("No transposon table found, will return empty DataFrame.")
                 continue
-            except:
-                raise
-
-            # Cleanup.
-            if len(table.columns) > 2:
-                table.drop(columns=2, inplace=True)
 
-            # Drop rows with NaNs.
-            table.dropna(inplace=True)
+            # The table lists key-value pairs, read them directly and skip incomplete rows.
+            rows = _rows_from_table(table)[1]
+            pairs = [(row[0], row[1]) for row in rows if len(row) > 1 and row[0] and row[1]]
 
-            # Re-index
-            number_of_indices = len(table.index)
-            table.index = range(number_of_indices)
-
-            number_of_unique_indices = len(set(table.loc[:,0]))
-            # Pandas indexing is inclusive upper bound.
-            tables = [table.iloc[i*number_of_unique_indices:(i+1)*number_of_unique_indices] for i in range(number_of_indices//number_of_unique_indices)]
-            # Now insert each table into the return dictionary.
+            # The same keys repeat for every insertion, split the pairs into one record per insertion.
             list_of_dicts = []
-            for i,table in enumerate(tables):
-                # Extract data to re-insert into dictionary from which to create the final frame.
-                keys = table.loc[:,0]
-                values = table.loc[:,1]
-                table_dict = OrderedDict(zip(keys, values))
-                list_of_dicts.append(table_dict)
+            if pairs:
+                number_of_unique_keys = len(set(k for k, v in pairs))
+                list_of_dicts = [OrderedDict(pairs[i*number_of_unique_keys:(i+1)*number_of_unique_keys]) for i in range(len(pairs)//number_of_unique_keys)]
 
             transposon_dict[key] = pandas.DataFrame(list_of_dicts)
 
@@ -603,9 +722,9 @@ class PseudomonasDotComScraper():
 
         # Get updates tab.
         updates_url = url + "&view=updates"
-        browser = BeautifulSoup(guarded_get(updates_url), 'lxml')
+        browser = BeautifulSoup(self._get_content(updates_url), 'lxml')
 
-        heading = browser.find('h3', string=re.compile('Annotation Updates'))
+        heading = browser.find('h3', string=_HEADING_PATTERNS['Annotation Updates'])
         updates = {"Annotation Updates" : pandas.read_html(str(heading.parent))[0]}
 
         return updates
@@ -623,9 +742,8 @@ class PseudomonasDotComScraper():
 
         # Setup target dictionary.
         subcellular_localizations = dict()
-        keys = ["Individual Mappings", "Additional evidence"]
-        for key in keys:
-            table_ht = str(soup.find('td', string=re.compile(key + ".*$")).find_next('table'))
+        for key, pattern in _LOCALIZATION_PATTERNS.items():
+            table_ht = str(soup.find('td', string=pattern).find_next('table'))
 
             try:
                 df = pandas.read_html(table_ht, index_col=None)[0]
@@ -664,7 +782,8 @@ class PseudomonasDotComScraper():
 
         # GET html. Bail out if none.
         try:
-            request = guarded_get(orthologs_url).decode('utf-8')
+            # The tab file's media type is not fixed, only check the status.
+            request = self._get_content(orthologs_url, expected_content_type='').decode('utf-8')
 
             # Buffer the data.
             with StringIO(request) as stream:
@@ -684,7 +803,8 @@ class PseudomonasDotComScraper():
 
         # GET html. Bail out if none.
         try:
-            request = guarded_get(ortholog_cluster_url).decode('utf-8')
+            # Downloads may be served as application/octet-stream, only check the status.
+            request = self._get_content(ortholog_cluster_url, expected_content_type='').decode('utf-8')
             with StringIO(request) as stream:
                 xml_dict = xmltodict.parse(stream.read())
         except:
@@ -768,20 +888,6 @@ def _deserialize(path):
     return ret
 
 
-def _dict_to_pdc_query(**kwargs):
-    """ """
-    """
-    Convert a dictionary of query key-value pairs to a pdc_query instance.
-
-    :param kwargs: Dictionary of query key-value pairs.
-    :type kwargs: dict
-    """
-
-    query = pdc_query(kwargs['strain'], kwargs['feature'], kwargs['organism'])
-
-    return query
-
-
 def _pandasDF_from_heading(soup, table_heading, index_column=0):
     """ """
     """ Find the table that belongs to the passed heading in a formatted html tree (the soup).
@@ -800,29 +906,181 @@ def _pandasDF_from_heading(soup, table_heading, index_column=0):
 
     """
 
-    # Get table html string.
-    table_ht = str(soup.find('h3', string=re.compile(table_heading)).find_next())
-    pattern = re.compile('[\t]')
-    table_ht = pattern.sub("", table_ht)
+    return _pandasDFs_from_headings(soup, {table_heading: index_column})[table_heading]
 
-    try:
-        df = pandas.read_html(table_ht, index_col=None)[0]
 
-        if index_column is not None:
+def _pandasDFs_from_headings(soup, headings):
+    """ """
+    """ Find the tables that belong to the passed headings in a formatted html tree (the soup). The tree is searched for headings only once.
+
+    :param soup: The html tree to parse.
+    :type  soup: BeautifulSoup
+
+    :param headings: The table headings to find, mapped to the column to use as the respective pandas.DataFrame's index.
+    :type  headings: dict
 
-            index = df[index_column]
-            pattern = re.compile('[\t\s]')
+    :return: The tables under the passed headings as pandas.DataFrame, keyed by heading.
+    :rtype: dict
 
-            df.index = [pattern.sub("_", idx) for idx in index]
-            del df[index_column]
+    """
 
-    except:
-        logging.warning("No data found for %s. Will return empty pandas.DataFrame.", table_heading)
-        df = pandas.DataFrame()
+    # Collect all headings in one pass over the tree.
+    h3s = [(h3.string, h3) for h3 in soup.find_all('h3') if h3.string is not None]
+
+    dfs = dict()
+    for table_heading, index_column in headings.items():
+        # Pick the first heading that matches.
+        pattern = _HEADING_PATTERNS.get(table_heading) or re.compile(table_heading)
+        heading = next((h3 for text, h3 in h3s if pattern.search(text)), None)
+
+        # Get the table element, either directly following the heading or wrapped in it.
+        element = heading.find_next()
+
+        try:
+            table = element if element.name == 'table' else element.find('table')
+            if table is None:
+                raise ValueError("No tables found.")
+
+            df = _pandasDF_from_table(table)
+
+            if index_column is not None:
+
+                index = df[index_column]
+
+                df.index = [_WHITESPACE_PATTERN.sub("_", idx) for idx in index]
+                del df[index_column]
+
+        except:
+            logging.warning("No data found for %s. Will return empty pandas.DataFrame.", table_heading)
+            df = pandas.DataFrame()
+
+        dfs[table_heading] = df
+
+    return dfs
+
+
+def _pandasDF_from_table(table):
+    """ """
+    """ Convert a html table element into a pandas.DataFrame, without re-parsing the table's html.
+
+    :param table: The table element.
+    :type  table: bs4.element.Tag
+
+    :return: The table content. Header cells (from <thead> or leading rows of <th> cells) become the column names, numeric columns are converted like pandas.read_html does.
+    :rtype: pandas.DataFrame
+
+    """
+
+    header, rows = _rows_from_table(table)
+
+    # Pad short rows with NaN. As read_html does, name empty header cells and columns beyond the
+    # header "Unnamed: <i>", and number repeated names "<name>.<n>".
+    width = max([len(row) for row in rows] + [len(header or [])])
+    if header is not None:
+        header = header + [""] * (width - len(header))
+        header = _dedup_names([name or "Unnamed: {0:d}".format(i) for i, name in enumerate(header)])
+
+    rows = [[numpy.nan if cell in _NA_VALUES else cell for cell in row] + [numpy.nan] * (width - len(row)) for row in rows]
+
+    df = pandas.DataFrame(rows, columns=header)
+
+    # Convert numeric columns (with ',' as thousands separator), leave all others as strings.
+    for column in df.columns:
+        try:
+            df[column] = pandas.to_numeric(df[column].str.replace(",", "", regex=False))
+        except (ValueError, TypeError, AttributeError):
+            pass
 
     return df
 
 
+def _dedup_names(names):
+    """ """
+    """ Number repeated column names like pandas does: the second 'A' becomes 'A.1', the third 'A.2'.
+
+    :param names: The column names.
+    :type  names: list
+
+    :return: The column names, all unique.
+    :rtype: list
+
+    """
+
+    counts = dict()
+    unique = []
+    for name in names:
+        count = counts.get(name, 0)
+        while count > 0:
+            counts[name] = count + 1
+            name = "{0:s}.{1:d}".format(name, count)
+            count = counts.get(name, 0)
+
+        counts[name] = count + 1
+        unique.append(name)
+
+    return unique
+
+
+def _rows_from_table(table):
+    """ """
+    """ Extract the cell texts of a html table element.
+
+    :param table: The table element.
+    :type  table: bs4.element.Tag
+
+    :return: The header (None if the table has none) and the rows, as lists of cell texts.
+    :rtype: tuple
+
+    """
+
+    header = None
+    rows = []
+
+    # Cells spanning down into the following rows, by column index: [rows left, text].
+    spans = dict()
+
+    for tr in table.find_all('tr'):
+        cells = tr.find_all(['td', 'th'], recursive=False)
+        if not cells:
+            continue
+
+        # Clean up cell text and expand cells spanning multiple columns or rows.
+        row = []
+        for cell in cells + [None]:
+            # Fill in the cells spanning down from previous rows.
+            while len(row) in spans:
+                span = spans[len(row)]
+                row.append(span[1])
+                span[0] -= 1
+                if span[0] == 0:
+                    del spans[len(row) - 1]
+
+            if cell is None:
+                break
+
+            text = _CELL_WHITESPACE_PATTERN.sub(" ", _TAB_PATTERN.sub("", cell.get_text()).strip())
+            rowspan = int(cell.get('rowspan', 1))
+            for _ in range(int(cell.get('colspan', 1))):
+                if rowspan > 1:
+                    spans[len(row)] = [rowspan - 1, text]
+                row.append(text)
+
+        if tr.parent.name == 'thead' or (not rows and all(cell.name == 'th' for cell in cells)):
+            header = row
+        else:
+            rows.append(row)
+
+    return header, rows
+
+
+@lru_cache(maxsize=256)
+def _feature_pattern(feature):
+    """ """
+    """ Return the compiled regular expression that matches the link text of the passed feature. """
+
+    return re.compile(feature.upper())
+
+
 def _pandas_references(soup):
     """ Extract references from given html soup and return them as pandas pandas.DataFrame. """
 
@@ -830,7 +1088,7 @@ def _pandas_references(soup):
     raw = []
 
     # Get the References "table".
-    ref_soup = soup.find("h3", string=re.compile('^References'))
+    ref_soup = soup.find("h3", string=_REFERENCES_PATTERN)
 
     # Get all <a> tags.
     a_tags = ref_soup.find_next().find_all('a')
@@ -850,12 +1108,12 @@ def _pandas_references(soup):
 def _get_doi_from_ncbi(pubmed_link):
         """ Extract the DOI from a pubmed link. """
 
-        if (pubmed_link != ''):
+        if pubmed_link:
             doi_soup = BeautifulSoup(guarded_get(pubmed_link), 'lxml')
-        line = doi_soup.find(string=re.compile("DOI")).find_parent().find_parent()
-        a = line.find('a', string=re.compile('10\.[0-9]*\/'))
+        line = doi_soup.find(string=_DOI_PATTERN).find_parent().find_parent()
+        a = line.find('a', string=_DOI_NUMBER_PATTERN)
         doi_string = a.text
-        doi = re.sub("[\t,\n,\s]", "", doi_string)
+        doi = _DOI_STRIP_PATTERN.sub("", doi_string)
 
         return doi
 
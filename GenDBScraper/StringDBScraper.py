@@ -126,7 +126,7 @@ class StringDBScraper(RESTScraper):
                 )
 
         # Get the response from post.
-        response = web_utilities.guarded_post(query_url, data)
+        response = web_utilities.guarded_post(query_url, data, expected_content_type='json')
 
         ret = pandas.DataFrame(response.json())
         ret.index = ret['queryItem']
@@ -187,8 +187,8 @@ class StringDBScraper(RESTScraper):
                 caller_identity="https://gendbscraper.readthedocs.io",
                 )
 
-        # Get the response from post.
-        response = web_utilities.guarded_post(query_url, data=data)
+        # Get the response from post. Both png and svg are served as image/*.
+        response = web_utilities.guarded_post(query_url, data=data, expected_content_type='image')
 
 
         # Determine file extension.
@@ -226,7 +226,7 @@ class StringDBScraper(RESTScraper):
                 )
 
         # Get the response from post.
-        response = web_utilities.guarded_post(query_url, data=data)
+        response = web_utilities.guarded_post(query_url, data=data, expected_content_type='json')
 
         ret = pandas.DataFrame(response.json())
 
@@ -273,7 +273,7 @@ class StringDBScraper(RESTScraper):
                 )
 
         # Get the response from post.
-        response = web_utilities.guarded_post(query_url, data=data)
+        response = web_utilities.guarded_post(query_url, data=data, expected_content_type='json')
 
         ret = pandas.DataFrame(response.json())
 
@@ -314,7 +314,7 @@ class StringDBScraper(RESTScraper):
                 )
 
         # Get the response from post.
-        response = web_utilities.guarded_post(query_url, data=data)
+        response = web_utilities.guarded_post(query_url, data=data, expected_content_type='json')
 
         ret = pandas.DataFrame(response.json())
 
@@ -347,7 +347,7 @@ class StringDBScraper(RESTScraper):
                 )
 
         # Get the response from post.
-        response = web_utilities.guarded_post(query_url, data=data)
+        response = web_utilities.guarded_post(query_url, data=data, expected_content_type='json')
 
         # Setup and return dataframe.
         ret = pandas.DataFrame(response.json())
@@ -388,7 +388,7 @@ class StringDBScraper(RESTScraper):
                 )
 
         # Get the response from post.
-        response = web_utilities.guarded_post(query_url, data=data)
+        response = web_utilities.guarded_post(query_url, data=data, expected_content_type='json')
 
         # Setup and return dataframe.
         ret = pandas.DataFrame(response.json())
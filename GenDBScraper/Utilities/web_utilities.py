@@ -1,31 +1,99 @@
 """ :module: hosting various utilities built on top of the requests module. """
 
-from contextlib import closing
 import logging
-from requests import get, post
+from requests import Session
+from requests.adapters import HTTPAdapter
 from requests.exceptions import RequestException
+from urllib3.util.retry import Retry
 
-def guarded_get(url):
+def new_session(pool_maxsize=10):
+    """ Setup a requests session that keeps connections alive and retries failed connections.
+
+    :param pool_maxsize: Maximum number of connections to keep open per host.
+    :type  pool_maxsize: int
+
+    """
+    adapter = HTTPAdapter(pool_connections=10,
+                          pool_maxsize=pool_maxsize,
+                          max_retries=Retry(total=3, backoff_factor=0.2),
+                          )
+
+    session = Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+
+    return session
+
+# Session used if none is passed to the functions below.
+_SESSION = new_session()
+
+def guarded_get(url, session=None, expected_content_type='text'):
     """ Get content of passed URL.
 
     :param url: The URL to parse.
     :type  url: str
 
+    :param session: The session to use for the request. Default: None, use the module wide session.
+    :type  session: requests.Session
+
+    :param expected_content_type: String to look for in the response's media type, see is_good_response(). Default: 'text'.
+    :type  expected_content_type: str
+
     """
-    # Safeguard opening the URL.
-    with closing(get(url, stream=True, timeout=60)) as resp:
-        if is_good_response(resp):
-            logging.info("Connected to %s .", url)
-            return resp.content
-        else:
-            raise RuntimeError("ERROR: Could not open "+url+" .")
+    if session is None:
+        session = _SESSION
+
+    # Safeguard opening the URL. The body is read in one go, so the connection is released right away.
+    resp = session.get(url, timeout=(5, 60))
+    if is_good_response(resp, expected_content_type):
+        logging.info("Connected to %s .", url)
+        return resp.content
+    else:
+        raise RuntimeError("ERROR: Could not open "+url+" .")
+
+def guarded_head(url, session=None):
+    """ Check that the passed URL is reachable without downloading its content.
+
+    :param url: The URL to check.
+    :type  url: str
 
-def guarded_post(url, data):
-    """ Post request to url in a safeguarded way. """
+    :param session: The session to use for the request. Default: None, use the module wide session.
+    :type  session: requests.Session
+
+    """
+    if session is None:
+        session = _SESSION
+
+    resp = session.head(url, timeout=(5, 60), allow_redirects=True)
+    if resp.status_code < 400:
+        logging.info("Connected to %s .", url)
+        return resp
+    else:
+        raise RuntimeError("ERROR: Could not open "+url+" .")
+
+def guarded_post(url, data, session=None, expected_content_type='text'):
+    """ Post request to url in a safeguarded way.
+
+    :param url: The URL to post to.
+    :type  url: str
+
+    :param data: The data to post.
+    :type  data: dict
+
+    :param session: The session to use for the request. Default: None, use the module wide session.
+    :type  session: requests.Session
+
+    :param expected_content_type: String to look for in the response's media type, see is_good_response(). Default: 'text'.
+    :type  expected_content_type: str
+
+    """
+
+    if session is None:
+        session = _SESSION
 
     try:
-        resp = post(url, data=data, stream=True)
-        if is_good_response(resp):
+        resp = session.post(url, data=data, stream=True)
+        if is_good_response(resp, expected_content_type):
             logging.info("Connected to %s.", url)
             return resp
         else:
@@ -35,17 +103,18 @@ def guarded_post(url, data):
 
 
 def is_good_response(resp, expected_content_type='text'):
-    """ Returns True if the response seems to be HTML, False otherwise.
+    """ Returns True if the response was successful and has the expected content type, False otherwise.
 
     :param resp: The response to validate.
-    :type  resp: http response as returned from contextlib.closing
+    :type  resp: requests.Response
+
+    :param expected_content_type: String to look for in the response's media type, e.g. 'html', 'json' or 'image'. Pass '' to only check the status code.
+    :type  expected_content_type: str
 
     """
 
-    content_type = resp.headers['Content-Type'].lower()
+    # Only the media type matters, skip parameters like charset.
+    content_type = resp.headers.get('Content-Type', '')
     return (resp.status_code == 200
-            and content_type is not None
-            and content_type.find(expected_content_type) > -1,
+            and expected_content_type in content_type.split(';', 1)[0].lower()
             )
-
-
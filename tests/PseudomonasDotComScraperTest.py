@@ -4,8 +4,9 @@
 from GenDBScraper.PseudomonasDotComScraper import PseudomonasDotComScraper
 from GenDBScraper.Utilities.web_utilities import guarded_get
 from GenDBScraper.PseudomonasDotComScraper import pdc_query,\
-                                                  _dict_to_pdc_query,\
                                                   _pandas_references,\
+                                                  _pandasDF_from_table,\
+                                                  _pandasDFs_from_headings,\
                                                   _get_bib_from_doi
 
 # Utilities
@@ -20,6 +21,7 @@ import re
 import unittest
 from io import StringIO
 from Bio import SeqIO
+from unittest import mock
 
 # Alias for generic tests.
 TestedClass = PseudomonasDotComScraper
@@ -51,6 +53,17 @@ def setup_scraper_incomplete():
     return scraper
 
 
+class FragmentScraper(PseudomonasDotComScraper):
+    """ Scraper that serves a fixed html fragment instead of fetching pages. """
+
+    def __init__(self, fragment):
+        super().__init__(use_cache=False)
+        self.fragment = fragment
+
+    def _get_content(self, url, expected_content_type='text'):
+        return self.fragment
+
+
 class PseudomonasDotComScraperTest(unittest.TestCase):
     """ :class: Test class for the PseudomonasDotComScraper """
 
@@ -87,7 +100,6 @@ class PseudomonasDotComScraperTest(unittest.TestCase):
         self.assertIsInstance(instance, TestedClass)
 
         # Check default attribute values.
-        self.assertIsNone(instance._PseudomonasDotComScraper__browser)
         self.assertEqual(instance._PseudomonasDotComScraper__pdc_url, 'https://www.pseudomonas.com')
         self.assertIsInstance(instance._PseudomonasDotComScraper__query[0], pdc_query)
         self.assertEqual(instance._PseudomonasDotComScraper__query[0].strain, 'sbw25')
@@ -218,6 +230,30 @@ class PseudomonasDotComScraperTest(unittest.TestCase):
         # Connect should bail out.
         self.assertRaises(ConnectionError, scraper.connect)
 
+    def test_close (self):
+        """ Test that closing the scraper resets the connection status. """
+
+        # Instantiate the class and connect.
+        scraper = PseudomonasDotComScraper(query=pdc_query(strain='sbw25'))
+        scraper.connect()
+
+        # Close.
+        scraper.close()
+
+        # Now we should be disconnected.
+        self.assertFalse(scraper.connected)
+
+    def test_context_manager (self):
+        """ Test using the scraper in a with block. """
+
+        with PseudomonasDotComScraper(query=pdc_query(strain='sbw25')) as scraper:
+            # Connected on entry.
+            self.assertIsInstance(scraper, PseudomonasDotComScraper)
+            self.assertTrue(scraper.connected)
+
+        # Disconnected on exit.
+        self.assertFalse(scraper.connected)
+
     def test_connected_read_only (self):
         """ Test that the connected status cannot be set. """
 
@@ -274,17 +310,91 @@ class PseudomonasDotComScraperTest(unittest.TestCase):
         for idx in ['Strain', 'Locus Tag', 'Name', 'Replicon', 'Genomic location']:
             self.assertIn(idx, present_indices)
 
-    def test_dict_to_pdc_query (self):
-        """ Test the conversion utility that returns a pdc_query (named_tuple) from a dict. """
+    def test_run_query_multiple (self):
+        """ Test running several queries concurrently. """
+
+        # Instantiate.
+        queries = [pdc_query(strain='sbw25', feature='pflu0916'), pdc_query(strain='sbw25', feature='pflu0917')]
+        scraper = PseudomonasDotComScraper(query=queries)
+
+        # Connect.
+        scraper.connect()
+
+        # Run with two workers.
+        results = scraper.run_query(max_workers=2)
 
-        query_dict = {'strain' : 'sbw25', 'feature' : 'pflu0914', 'organism':None}
+        # Results are returned and stored.
+        self.assertIs(results, scraper.results)
 
-        query_pdc = _dict_to_pdc_query(**query_dict)
+        # Check query keys.
+        check_keys(self, ["sbw25__pflu0916", "sbw25__pflu0917"], results)
 
-        self.assertIsInstance(query_pdc, pdc_query)
-        self.assertEqual(query_pdc.strain, 'sbw25')
-        self.assertEqual(query_pdc.feature, 'pflu0914')
-        self.assertIsNone(query_pdc.organism)
+    def test_run_query_pool_size (self):
+        """ Test that the connection pool is grown to hold all concurrent panel requests. """
+
+        with mock.patch('GenDBScraper.PseudomonasDotComScraper.guarded_head'):
+            scraper = PseudomonasDotComScraper(query=pdc_query(strain='sbw25'))
+            scraper.connect()
+
+        def pool_maxsize():
+            return scraper._PseudomonasDotComScraper__session.get_adapter('https://www.pseudomonas.com')._pool_maxsize
+
+        # The default pool holds the requests of the default number of queries.
+        scraper.run_query(query=[])
+        self.assertEqual(pool_maxsize(), 32)
+
+        scraper.run_query(query=[], max_workers=6)
+        self.assertEqual(pool_maxsize(), 48)
+
+    def test_context_manager_connect_failure (self):
+        """ Test that the session is closed if connecting fails on entering a with block. """
+
+        scraper = PseudomonasDotComScraper(query=pdc_query(strain='sbw25'))
+
+        with mock.patch('GenDBScraper.PseudomonasDotComScraper.guarded_head', side_effect=RuntimeError), \
+             mock.patch.object(scraper._PseudomonasDotComScraper__session, 'close') as close:
+            with self.assertRaises(ConnectionError):
+                with scraper:
+                    pass
+
+            close.assert_called_once_with()
+
+    def test_get_content_cached (self):
+        """ Test that repeated requests for the same page are served from the cache. """
+
+        url = "https://www.pseudomonas.com/feature/show/?id=1661780&view=overview"
+
+        # With cache, the second request returns the very same content object.
+        scraper = PseudomonasDotComScraper(query=pdc_query(strain='sbw25'))
+        self.assertIs(scraper._get_content(url), scraper._get_content(url))
+
+        # Closing the scraper empties the cache.
+        content = scraper._get_content(url)
+        scraper.close()
+        self.assertIsNot(scraper._get_content(url), content)
+
+        # Without cache, the page is fetched again.
+        scraper = PseudomonasDotComScraper(query=pdc_query(strain='sbw25'), use_cache=False)
+        self.assertIsNot(scraper._get_content(url), scraper._get_content(url))
+
+    def test_get_content_cache_bounded (self):
+        """ Test that the cache evicts the least recently used page once it is full. """
+
+        contents = ("page {0:d}".format(i).encode() for i in range(1000))
+
+        with mock.patch('GenDBScraper.PseudomonasDotComScraper.guarded_get', side_effect=lambda *args: next(contents)):
+            scraper = PseudomonasDotComScraper(query=pdc_query(strain='sbw25'))
+            first = scraper._get_content("url0")
+            second = scraper._get_content("url1")
+
+            # Use the first page again, then fill the cache up.
+            self.assertIs(scraper._get_content("url0"), first)
+            for i in range(2, 257):
+                scraper._get_content("url{0:d}".format(i))
+
+            # The least recently used page was dropped, the first page was kept.
+            self.assertIs(scraper._get_content("url0"), first)
+            self.assertIsNot(scraper._get_content("url1"), second)
 
     def test_get_subcellular_localizations (self):
         """ Test the subcellular_localizaton scraping. """
@@ -611,7 +721,7 @@ class PseudomonasDotComScraperTest(unittest.TestCase):
 
         # Check first author.
         citation = results.loc[0]['citation']
-        rx = re.compile('Allsopp\s')
+        rx = re.compile(r'Allsopp\s')
 
         self.assertIsNotNone(rx.match(citation))
 
@@ -624,6 +734,58 @@ class PseudomonasDotComScraperTest(unittest.TestCase):
 
         print(references)
 
+    def test_pandasDF_from_table_irregular (self):
+        """ Test that rowspans, ragged rows, and thousands separators are handled like pandas.read_html does. """
+
+        html = """<table><thead><tr><th>A</th><th>B</th></tr></thead><tbody>
+                  <tr><td rowspan="2">x</td><td>1,234</td></tr>
+                  <tr><td>5,678</td></tr>
+                  <tr><td>y</td><td>7</td><td>extra</td></tr>
+                  <tr><td>z</td></tr>
+                  </tbody></table>"""
+
+        df = _pandasDF_from_table(BeautifulSoup(html, 'lxml').find('table'))
+
+        self.assertEqual(list(df.columns), ['A', 'B', 'Unnamed: 2'])
+        self.assertEqual(list(df['A']), ['x', 'x', 'y', 'z'])
+        self.assertEqual(list(df['B'].iloc[:3]), [1234, 5678, 7])
+        self.assertTrue(numpy.isnan(df['B'].iloc[3]))
+        self.assertEqual(df['Unnamed: 2'].iloc[2], 'extra')
+
+        # Repeated header names are numbered, NA strings become NaN, and both columns are converted.
+        html = """<table><thead><tr><th>A</th><th>A</th><th>C</th></tr></thead><tbody>
+                  <tr><td>1</td><td>2</td><td>N/A</td></tr>
+                  <tr><td>3</td><td>4</td><td>3</td></tr>
+                  </tbody></table>"""
+
+        df = _pandasDF_from_table(BeautifulSoup(html, 'lxml').find('table'))
+
+        self.assertEqual(list(df.columns), ['A', 'A.1', 'C'])
+        self.assertEqual(df['A'].dtype, numpy.int64)
+        self.assertEqual(df['A.1'].dtype, numpy.int64)
+        self.assertEqual(df['C'].dtype, numpy.float64)
+        self.assertTrue(numpy.isnan(df['C'].iloc[0]))
+
+    def test_functions_heading_without_table (self):
+        """ Test that a heading without a table does not pick up an unrelated table further down the page. """
+
+        fragment = b"""<html><body>
+                       <h3>Gene Ontology</h3><div><p>No GO terms.</p></div>
+                       <h4>Legend</h4><table><tr><td>a</td><td>b</td></tr></table>
+                       <h3>Functional Classifications Manually Assigned by PseudoCAP</h3><div><p>None.</p></div>
+                       <h3>Functional Predictions from Interpro</h3>
+                       <table><thead><tr><th>Accession</th><th>E-value</th></tr></thead>
+                       <tbody><tr><td>IPR000001</td><td>1e-10</td></tr></tbody></table>
+                       </body></html>"""
+
+        panels = FragmentScraper(fragment)._get_functions_pathways_go("https://www.pseudomonas.com/feature/show/?id=1")
+        expected = _pandasDFs_from_headings(BeautifulSoup(fragment, 'lxml'), {"Gene Ontology": None})
+
+        # The tab is parsed like the full page.
+        self.assertTrue(panels["Gene Ontology"].equals(expected["Gene Ontology"]))
+        self.assertTrue(panels["Gene Ontology"].empty)
+        self.assertEqual(panels["Functional Predictions from Interpro"].shape, (1, 2))
+
     def test_bib_from_doi (self):
         """ Test the get_bib_from_doi utility. """
 
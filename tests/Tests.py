@@ -6,6 +6,7 @@ import os, sys
 # Import suites to run.
 from PseudomonasDotComScraperTest import PseudomonasDotComScraperTest
 from StringDBScraperTest import StringDBScraperTest
+from WebUtilitiesTest import WebUtilitiesTest
 
 # Are we running on CI server?
 is_travisCI = ("TRAVIS_BUILD_DIR" in list(os.environ.keys())) and (os.environ["TRAVIS_BUILD_DIR"] != "")
@@ -16,6 +17,7 @@ def suite():
     suites = [
                unittest.makeSuite(PseudomonasDotComScraperTest, 'test'),
                unittest.makeSuite(StringDBScraperTest, 'test'),
+               unittest.makeSuite(WebUtilitiesTest, 'test'),
              ]
 
     return unittest.TestSuite(suites)
@@ -0,0 +1,67 @@
+""" :module WebUtilitiesTest: Test module for web_utilities."""
+
+# Import module to be tested.
+from GenDBScraper.Utilities import web_utilities
+
+# 3rd party imports
+import requests
+import unittest
+
+def _make_response(status_code=200, content_type='application/json', content=b'{"ok": true}'):
+    """ Build a requests.Response without touching the network. """
+    resp = requests.Response()
+    resp.status_code = status_code
+    resp.headers['Content-Type'] = content_type
+    resp._content = content
+
+    return resp
+
+class _FakeSession():
+    """ Stand-in for requests.Session that hands out a fixed response. """
+
+    def __init__(self, resp):
+        self.resp = resp
+
+    def get(self, url, **kwargs):
+        return self.resp
+
+    def post(self, url, data=None, **kwargs):
+        return self.resp
+
+class WebUtilitiesTest(unittest.TestCase):
+    """ :class: Test class for the web_utilities module. """
+
+    def test_is_good_response_json(self):
+        """ Test that a json response is only accepted if json is expected. """
+
+        resp = _make_response(content_type='application/json; charset=utf-8')
+
+        self.assertTrue(web_utilities.is_good_response(resp, 'json'))
+        self.assertFalse(web_utilities.is_good_response(resp))
+
+    def test_is_good_response_status_only(self):
+        """ Test that an empty expected content type only checks the status code. """
+
+        self.assertTrue(web_utilities.is_good_response(_make_response(content_type=''), ''))
+        self.assertFalse(web_utilities.is_good_response(_make_response(status_code=404), ''))
+
+    def test_guarded_post_json(self):
+        """ Test posting to an endpoint that answers with json. """
+
+        session = _FakeSession(_make_response())
+
+        resp = web_utilities.guarded_post('https://example.org/api/json', data={}, session=session, expected_content_type='json')
+        self.assertEqual(resp.json(), {'ok': True})
+
+        self.assertRaises(RuntimeError, web_utilities.guarded_post, 'https://example.org/api/json', {}, session)
+
+    def test_guarded_get_image(self):
+        """ Test getting an image. """
+
+        session = _FakeSession(_make_response(content_type='image/png', content=b'\x89PNG'))
+
+        self.assertEqual(web_utilities.guarded_get('https://example.org/image', session, 'image'), b'\x89PNG')
+        self.assertRaises(RuntimeError, web_utilities.guarded_get, 'https://example.org/image', session)
+
+if __name__ == '__main__':
+    unittest.main()